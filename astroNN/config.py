@@ -41,6 +41,7 @@ def config_path(flag=None):
         custom_model_init = 'None'
         cpu_fallback_init = False
         gpu_memratio_init = True
+        gpu_async_allocator_init = False
 
         # Set flag back to 0 as flag=1 probably just because the file not even exists (example: first time using it)
         if not os.path.isfile(fullpath):
@@ -71,6 +72,10 @@ def config_path(flag=None):
                 gpu_memratio_init = config['NeuralNet']['GPU_Mem_ratio']
             except KeyError:
                 pass
+            try:
+                gpu_async_allocator_init = config['NeuralNet']['GPU_Async_Allocator']
+            except KeyError:
+                pass
         elif flag == 2:
             # pass because flag==2 is resetting the file
             pass
@@ -95,7 +100,8 @@ def config_path(flag=None):
                             'EnvironmentVariableWarning': envvar_warning_flag_init}
         config['NeuralNet'] = {'CustomModelPath': custom_model_init,
                                'CPUFallback': cpu_fallback_init,
-                               'GPU_Mem_ratio': gpu_memratio_init}
+                               'GPU_Mem_ratio': gpu_memratio_init,
+                               'GPU_Async_Allocator': gpu_async_allocator_init}
 
         with open(fullpath, 'w') as configfile:
             config.write(configfile)
@@ -233,14 +239,38 @@ def cpu_gpu_reader():
         return cpu_gpu_reader()
 
 
+def gpu_async_allocator_reader():
+    """
+    NAME: gpu_async_allocator_reader
+    PURPOSE: to read whether to use CUDA stream-ordered allocator from configuration file
+    INPUT:
+    OUTPUT:
+        (boolean)
+    HISTORY:
+        2026-Oct-15 - Written
+    """
+    cpath = config_path()
+    config = configparser.ConfigParser()
+    config.read(cpath)
+
+    try:
+        string = config['NeuralNet']['GPU_Async_Allocator']
+        return True if string.upper() == 'TRUE' else False
+    except KeyError:
+        config_path(flag=1)
+        return gpu_async_allocator_reader()
+
+
 def cpu_gpu_check():
     fallback_cpu, limit_gpu_mem = cpu_gpu_reader()
     if fallback_cpu is True:
         cpu_fallback()
+    # stream-ordered allocator is meaningless without GPU
+    async_allocator = gpu_async_allocator_reader() and not fallback_cpu
     if isinstance(limit_gpu_mem, float) is True:
         gpu_memory_manage(ratio=limit_gpu_mem)
     else:
-        gpu_memory_manage()
+        gpu_memory_manage(async_allocator=async_allocator)
 
 
 # Constant from configuration file
@@ -14,14 +14,42 @@ import tensorflow.keras as tfk
 from packaging import version
 
 import astroNN
-from astroNN.config import _astroNN_MODEL_NAME
+from astroNN.config import MAGIC_NUMBER, _astroNN_MODEL_NAME
 from astroNN.config import cpu_gpu_check
+from astroNN.nn.layers import MCDropout, MCGaussianDropout, MCConcreteDropout, ErrorProp
 from astroNN.shared.custom_warnings import deprecated
 from astroNN.shared.nn_tools import folder_runnum
 
 get_session = tf.compat.v1.keras.backend.get_session
 epsilon, plot_model = tfk.backend.epsilon, tfk.utils.plot_model
 
+# lookup tables from the dimension of data array to the shape of a single data point
+_INPUT_SHAPE_LOOKUP = {1: lambda shape: (1, 1,),
+                       2: lambda shape: (shape[1], 1,),
+                       3: lambda shape: (shape[1], shape[2], 1,),
+                       4: lambda shape: (shape[1], shape[2], shape[3],)}
+_LABELS_SHAPE_LOOKUP = {1: lambda shape: 1,
+                        2: lambda shape: shape[1],
+                        3: lambda shape: (shape[1], shape[2]),
+                        4: lambda shape: (shape[1], shape[2], shape[3])}
+
+
+def _flatten_layers(layers):
+    """
+    Recursively yield layers, including those inside nested models and layer wrappers
+
+    :param layers: List of keras layers
+    :type layers: list
+    :return: Generator of keras layers
+    :rtype: generator
+    """
+    for layer in layers:
+        yield layer
+        if isinstance(layer, tfk.layers.Wrapper):
+            yield from _flatten_layers([layer.layer])
+        elif hasattr(layer, 'layers'):
+            yield from _flatten_layers(layer.layers)
+
 
 class NeuralNetMaster(ABC):
     """
@@ -122,6 +150,8 @@ class NeuralNetMaster(ABC):
         self.session = None
         self.graph = None
 
+        self._jacobian_tensors = None  # cache for jacobian graph
+
         cpu_gpu_check()
 
     def __str__(self):
@@ -179,24 +209,17 @@ class NeuralNetMaster(ABC):
         # only require if it is new, no need for fine-tuning
         # in case you read this for dense network, use Flattener as first layer in your network to flatten it
         if self._input_shape is None:
-            if input_data.ndim == 1:
-                self._input_shape = (1, 1,)
-            elif input_data.ndim == 2:
-                self._input_shape = (input_data.shape[1], 1,)
-            elif input_data.ndim == 3:
-                self._input_shape = (input_data.shape[1], input_data.shape[2], 1,)
-            elif input_data.ndim == 4:
-                self._input_shape = (input_data.shape[1], input_data.shape[2], input_data.shape[3],)
-
+            try:
+                self._input_shape = _INPUT_SHAPE_LOOKUP[input_data.ndim](input_data.shape)
+            except KeyError:
+                raise ValueError(f'Input data with {input_data.ndim} dimensions are not supported, '
+                                 f'only 1 to 4 dimensions are supported') from None
             # zeroth dim should always be number of data
-            if labels.ndim == 1:
-                self._labels_shape = 1
-            elif labels.ndim == 2:
-                self._labels_shape = (labels.shape[1])
-            elif labels.ndim == 3:
-                self._labels_shape = (labels.shape[1], labels.shape[2])
-            elif labels.ndim == 4:
-                self._labels_shape = (labels.shape[1], labels.shape[2], labels.shape[3])
+            try:
+                self._labels_shape = _LABELS_SHAPE_LOOKUP[labels.ndim](labels.shape)
+            except KeyError:
+                raise ValueError(f'Labels with {labels.ndim} dimensions are not supported, '
+                                 f'only 1 to 4 dimensions are supported') from None
 
         print(f'Number of Training Data: {self.num_train}, Number of Validation Data: {self.val_num}')
 
@@ -240,30 +263,30 @@ class NeuralNetMaster(ABC):
 
         self.fullfilepath = os.path.join(self.currentdir, self.folder_name + os.sep)
 
-        txt_file_path = self.fullfilepath + 'hyperparameter.txt'
+        txt_file_path = os.path.join(self.fullfilepath, 'hyperparameter.txt')
         if os.path.isfile(txt_file_path):
             self.hyper_txt = open(txt_file_path, 'a')
-            self.hyper_txt.write("\n")
-            self.hyper_txt.write("======Another Run======")
+            self.hyper_txt.write("\n======Another Run======")
         else:
             self.hyper_txt = open(txt_file_path, 'w')
-        self.hyper_txt.write(f"Model: {self.name} \n")
-        self.hyper_txt.write(f"Model Type: {self._model_type} \n")
-        self.hyper_txt.write(f"astroNN identifier: {self._model_identifier} \n")
-        self.hyper_txt.write(f"Python Version: {self._python_info} \n")
-        self.hyper_txt.write(f"astroNN Version: {self._astronn_ver} \n")
-        self.hyper_txt.write(f"Keras Version: {self._keras_ver} \n")
-        self.hyper_txt.write(f"Tensorflow Version: {self._tf_ver} \n")
-        self.hyper_txt.write(f"Folder Name: {self.folder_name} \n")
-        self.hyper_txt.write(f"Batch size: {self.batch_size} \n")
-        self.hyper_txt.write(f"Optimizer: {self.optimizer.__class__.__name__} \n")
-        self.hyper_txt.write(f"Maximum Epochs: {self.max_epochs} \n")
-        self.hyper_txt.write(f"Learning Rate: {self.lr} \n")
-        self.hyper_txt.write(f"Validation Size: {self.val_size} \n")
-        self.hyper_txt.write(f"Input Shape: {self._input_shape} \n")
-        self.hyper_txt.write(f"Label Shape: {self._labels_shape} \n")
-        self.hyper_txt.write(f"Number of Training Data: {self.num_train} \n")
-        self.hyper_txt.write(f"Number of Validation Data: {self.val_num} \n")
+        # file is not closed here because post_training_checklist_child() will append to it and close it
+        self.hyper_txt.write(f"Model: {self.name} \n"
+                             f"Model Type: {self._model_type} \n"
+                             f"astroNN identifier: {self._model_identifier} \n"
+                             f"Python Version: {self._python_info} \n"
+                             f"astroNN Version: {self._astronn_ver} \n"
+                             f"Keras Version: {self._keras_ver} \n"
+                             f"Tensorflow Version: {self._tf_ver} \n"
+                             f"Folder Name: {self.folder_name} \n"
+                             f"Batch size: {self.batch_size} \n"
+                             f"Optimizer: {self.optimizer.__class__.__name__} \n"
+                             f"Maximum Epochs: {self.max_epochs} \n"
+                             f"Learning Rate: {self.lr} \n"
+                             f"Validation Size: {self.val_size} \n"
+                             f"Input Shape: {self._input_shape} \n"
+                             f"Label Shape: {self._labels_shape} \n"
+                             f"Number of Training Data: {self.num_train} \n"
+                             f"Number of Validation Data: {self.val_num} \n")
 
         if model_plot is True:
             self.plot_model()
@@ -548,9 +571,15 @@ class NeuralNetMaster(ABC):
 
         return hessians_diag_master
 
-    def jacobian(self, x=None, mean_output=False, mc_num=1, denormalize=False):
+    def jacobian(self, x=None, mean_output=False, mc_num=1, denormalize=False, dtype=np.float32, jit_compile=False):
         """
-        | Calculate jacobian of gradient of output to input high performance calculation update on 15 April 2018
+        | Calculate jacobian of gradient of output to input
+        |
+        | Input data are normalized on device and the jacobian is calculated in batches of ``self.batch_size``.
+        | Forward mode is used if the model has fewer input features than output neurones, is deterministic and
+        | Tensorflow is 2.1 or above, otherwise reverse mode is used. Device memory scales with
+        | ``self.batch_size`` x number of output neurones x number of input features, so lower ``self.batch_size``
+        | if you run out of GPU memory.
         |
         | Please notice that the de-normalize (if True) assumes the output depends on the input data first orderly
         | in which the equation is simply jacobian divided the input scaling, usually a good approx. if you use ReLU all the way
@@ -559,15 +588,21 @@ class NeuralNetMaster(ABC):
         :type x: ndarray
         :param mean_output: False to get all jacobian, True to get the mean
         :type mean_output: boolean
-        :param mc_num: Number of monte carlo integration
+        :param mc_num: Number of monte carlo integration, each is an independent pass over the data and the result is
+            averaged over them
         :type mc_num: int
         :param denormalize: De-normalize Jacobian
         :type denormalize: bool
+        :param dtype: Data type of the returned Jacobian, np.float16 halves the memory if the precision is acceptable
+        :type dtype: type
+        :param jit_compile: True to compile the calculation with XLA, requires Tensorflow 2.1 or above
+        :type jit_compile: bool
         :return: An array of Jacobian
         :rtype: ndarray
         :History:
             | 2017-Nov-20 - Written - Henry Leung (University of Toronto)
             | 2018-Apr-15 - Updated - Henry Leung (University of Toronto)
+            | 2026-Oct-15 - Updated - batched forward/reverse mode calculation with on device normalization
         """
         self.has_model_check()
         if x is None:
@@ -576,24 +611,39 @@ class NeuralNetMaster(ABC):
         if mc_num < 1 or isinstance(mc_num, float):
             raise ValueError('mc_num must be a positive integer')
 
-        if self.input_normalizer is not None:
-            x_data = self.input_normalizer.normalize(x, calc=False)
+        if jit_compile and version.parse(tf.__version__) < version.parse("2.1.0"):
+            raise ValueError('jit_compile=True requires Tensorflow 2.1 or above')
+
+        # float32 to prevent silently upcasting to float64 for the whole array
+        x_data = np.asarray(x, dtype=np.float32)
+        # 1D input is treated as many data points with a single feature
+        if x_data.ndim == 1:
+            x_data = x_data[:, np.newaxis]
+
+        # normalization is done on device unless the normalizer uses a custom numpy function (i.e. mode '3s'),
+        # check the mode instead of the function because it is only set after the normalizer is used once
+        if self.input_normalizer is not None and str(self.input_normalizer.normalization_mode) == '3s':
+            x_data = self.input_normalizer.normalize(x_data, calc=False)
+            input_mean, input_std = 0., 1.
+        elif self.input_normalizer is not None:
+            input_mean, input_std = self.input_normalizer.mean_labels, self.input_normalizer.std_labels
         else:
-            # Prevent shallow copy issue
-            x_data = np.array(x)
-            x_data -= self.input_mean
-            x_data /= self.input_std
+            input_mean, input_std = self.input_mean, self.input_std
+
+        # featurewise mean and std must have the same shape as a single data point
+        if any(np.size(i) > 1 and x_data.shape[1:] != np.shape(i) for i in (input_mean, input_std)):
+            raise ValueError('Input data shape do not match neural network expectation')
 
         try:
-            input_tens = self.keras_model_predict.get_layer("input").input
-            output_tens = self.keras_model_predict.get_layer("output").output
-            input_shape_expectation = self.keras_model_predict.get_layer("input").input_shape
-            output_shape_expectation = self.keras_model_predict.get_layer("output").output_shape
+            model = self.keras_model_predict
+            input_tens = model.get_layer("input").input
+            output_tens = model.get_layer("output").output
+            input_shape_expectation = model.get_layer("input").input_shape
         except AttributeError:
-            input_tens = self.keras_model.get_layer("input").input
-            output_tens = self.keras_model.get_layer("output").output
-            input_shape_expectation = self.keras_model.get_layer("input").input_shape
-            output_shape_expectation = self.keras_model.get_layer("output").output_shape
+            model = self.keras_model
+            input_tens = model.get_layer("input").input
+            output_tens = model.get_layer("output").output
+            input_shape_expectation = model.get_layer("input").input_shape
         except ValueError:
             raise ValueError("astroNN expects input layer is named as 'input' and output layer is named as 'output', "
                              "but None is found.")
@@ -612,53 +662,144 @@ class NeuralNetMaster(ABC):
 
         total_num = x_data.shape[0]
 
-        grad_list = []
-        for j in range(self._labels_shape):
-            grad_list.append(tf.gradients(output_tens[:, j], input_tens))
-
-        final_stack = tf.stack(tf.squeeze(grad_list))
+        # broadcast mean and std to the shape of a single data point of the neural network input
+        data_point_shape = tuple(input_shape_expectation[1:])
+        input_mean, input_std = [np.broadcast_to(np.reshape(i, data_point_shape if np.size(i) > 1 else ()),
+                                                 data_point_shape).astype(np.float32) for i in (input_mean, input_std)]
+
+        # only build the graph once for each model, otherwise the graph grows every time jacobian is called
+        if self._jacobian_tensors is None or self._jacobian_tensors['model'] is not model or \
+                self._jacobian_tensors['jit_compile'] != jit_compile:
+            # pfor cannot vectorize the while_loop inside recurrent layers, fallback to while_loop for those models
+            use_pfor = not any(isinstance(layer, tfk.layers.RNN) for layer in _flatten_layers(model.layers))
+            # forward mode runs the model once per input feature, so stochastic layers would draw a different noise for
+            # each of them, only use forward mode when the model is deterministic
+            stochastic_layers = (MCDropout, MCGaussianDropout, MCConcreteDropout, ErrorProp, tfk.layers.Dropout,
+                                 tfk.layers.GaussianDropout, tfk.layers.GaussianNoise)
+            deterministic = not any(isinstance(layer, stochastic_layers) and not getattr(layer, 'disable_layer', False)
+                                    for layer in _flatten_layers(model.layers))
+
+            with input_tens.graph.as_default():
+                jacobian_model = tfk.Model(inputs=input_tens, outputs=output_tens)
+                # data pipeline with prefetch so the next batch is copied while the current one is being computed
+                x_tens = tf.compat.v1.placeholder(tf.float32, shape=input_tens.shape)
+                batch_size_tens = tf.compat.v1.placeholder(tf.int64, shape=[])
+                dataset = tf.data.Dataset.from_tensor_slices(x_tens).batch(batch_size_tens).prefetch(
+                    tf.data.experimental.AUTOTUNE)
+                iterator = tf.compat.v1.data.make_initializable_iterator(dataset)
+                x_batch = iterator.get_next()
+
+                # normalize on device and leave magic number untouched like what Normalizer does
+                mean_tens = tf.compat.v1.placeholder(tf.float32, shape=input_tens.shape[1:])
+                std_tens = tf.compat.v1.placeholder(tf.float32, shape=input_tens.shape[1:])
+                x_batch = tf.where(tf.equal(x_batch, MAGIC_NUMBER), x_batch, (x_batch - mean_tens) / std_tens)
+
+                input_shape = input_tens.shape.as_list()[1:]
+                output_shape = output_tens.shape.as_list()[1:]
+                input_num, output_num = int(np.prod(input_shape)), int(np.prod(output_shape))
+                # reverse mode costs scale with the number of output neurones while forward mode costs scale with
+                # the number of input features, so use forward mode when there are fewer input features
+                use_forward = deterministic and input_num < output_num and \
+                    version.parse(tf.__version__) >= version.parse("2.1.0")
+
+                def jacobian_fn(x_batch):
+                    if use_forward:
+                        def jvp(basis):
+                            # jacobian-vector product with a one-hot vector is the derivative to a single input feature
+                            tangents = tf.broadcast_to(basis, tf.shape(x_batch))
+                            with tf.autodiff.ForwardAccumulator(x_batch, tangents) as acc:
+                                y_batch = jacobian_model(x_batch)
+                            return acc.jvp(y_batch)
+
+                        # vectorize the forward passes of all input features into one with pfor
+                        bases = tf.reshape(tf.eye(input_num), [input_num, *input_shape])
+                        jacobian_tens = tf.vectorized_map(jvp, bases) if use_pfor else tf.map_fn(jvp, bases)
+                        # (input, batch, *output shape) to (batch, *output shape, input)
+                        jacobian_tens = tf.transpose(jacobian_tens, perm=[1, *range(2, len(output_shape) + 2), 0])
+                    else:
+                        y_batch = jacobian_model(x_batch)
+
+                        def vjp(basis):
+                            # vector-jacobian product with a one-hot vector is the gradient of a single output neurone,
+                            # data points are independent so summing over the batch still gives per data point gradient
+                            grad_ys = tf.broadcast_to(basis, tf.shape(y_batch))
+                            return tf.gradients(y_batch, x_batch, grad_ys=grad_ys)[0]
+
+                        # vectorize the backward passes of all output neurones into one with pfor
+                        bases = tf.reshape(tf.eye(output_num), [output_num, *output_shape])
+                        jacobian_tens = tf.vectorized_map(vjp, bases) if use_pfor else tf.map_fn(vjp, bases)
+                        # (output, batch, *input shape) to (batch, output, *input shape)
+                        jacobian_tens = tf.transpose(jacobian_tens, perm=[1, 0, *range(2, len(input_shape) + 2)])
+                    return tf.reshape(jacobian_tens, [-1, *output_shape, *input_shape])
+
+                if jit_compile:
+                    # let XLA fuse the vectorized passes into fewer kernels
+                    if version.parse(tf.__version__) >= version.parse("2.5.0"):
+                        jacobian_fn = tf.function(jacobian_fn, jit_compile=True)
+                    else:
+                        jacobian_fn = tf.function(jacobian_fn, experimental_compile=True)
+                jacobian_tens = jacobian_fn(x_batch)
+                # reduce on device so only the reduced jacobian is transferred back for mean_output
+                jacobian_sum_tens = tf.reduce_sum(jacobian_tens, axis=0)
+
+            self._jacobian_tensors = {'model': model,
+                                      'jit_compile': jit_compile,
+                                      'forward_mode': use_forward,
+                                      'x': x_tens,
+                                      'batch_size': batch_size_tens,
+                                      'mean': mean_tens,
+                                      'std': std_tens,
+                                      'iterator': iterator,
+                                      'jacobian': jacobian_tens,
+                                      'jacobian_sum': jacobian_sum_tens}
 
-        # Looping variables for tensorflow setup
-        i = tf.constant(0)
-        mc_num_tf = tf.constant(mc_num)
-        #  To store final result
-        l = tf.TensorArray(dtype=tf.float32, infer_shape=False, size=1, dynamic_size=True)
-
-        def body(i, l):
-            l = l.write(i, final_stack)
-            return i + 1, l
-
-        tf_index, loop = tf.while_loop(lambda i, *_: tf.less(i, mc_num_tf), body, [i, l])
-
-        loops = tf.cond(tf.greater(mc_num_tf, 1), lambda: tf.reduce_mean(loop.stack(), axis=0), lambda: loop.stack())
-        loops = tf.reshape(loops,
-                           shape=[tf.shape(input_tens)[0], *output_shape_expectation[1:], *input_shape_expectation[1:]])
         start_time = time.time()
 
-        jacobian = np.concatenate(
-            [get_session().run(loops, feed_dict={input_tens: x_data[i:i + 1], tfk.backend.learning_phase(): 0}) for i
-             in range(0, total_num)], axis=0)
+        jacobian_shape = (*output_tens.shape.as_list()[1:], *input_tens.shape.as_list()[1:])
+        iterator_feed_dict = {self._jacobian_tensors['x']: x_data,
+                              self._jacobian_tensors['batch_size']: self.batch_size}
+        feed_dict = {self._jacobian_tensors['mean']: input_mean,
+                     self._jacobian_tensors['std']: input_std,
+                     tfk.backend.learning_phase(): 0}
 
         if mean_output is True:
-            jacobian_master = np.mean(jacobian, axis=0)
+            jacobian_sum = np.zeros(jacobian_shape, dtype=np.float64)
+            for _ in range(mc_num):
+                get_session().run(self._jacobian_tensors['iterator'].initializer, feed_dict=iterator_feed_dict)
+                for i in range(0, total_num, self.batch_size):
+                    jacobian_sum += get_session().run(self._jacobian_tensors['jacobian_sum'], feed_dict=feed_dict)
+            jacobian_master = (jacobian_sum / (total_num * mc_num)).astype(np.float32)
         else:
-            jacobian_master = np.array(jacobian)
+            # every element will be written in the first monte carlo pass so no need to initialize
+            jacobian_master = np.empty((total_num, *jacobian_shape), dtype=np.float32)
+            for mc_idx in range(mc_num):
+                get_session().run(self._jacobian_tensors['iterator'].initializer, feed_dict=iterator_feed_dict)
+                for i in range(0, total_num, self.batch_size):
+                    jacobian_batch = get_session().run(self._jacobian_tensors['jacobian'], feed_dict=feed_dict)
+                    if mc_idx == 0:
+                        jacobian_master[i:i + self.batch_size] = jacobian_batch
+                    else:
+                        jacobian_master[i:i + self.batch_size] += jacobian_batch
+            if mc_num > 1:
+                jacobian_master /= mc_num
 
         jacobian_master = np.squeeze(jacobian_master)
 
+        # de-normalize in-place to prevent another full size copy of jacobian
         if denormalize:
             if self.input_std is not None:
-                jacobian_master = jacobian_master / np.squeeze(self.input_std)
+                jacobian_master /= np.squeeze(self.input_std)
 
             if self.labels_std is not None:
                 try:
-                    jacobian_master = jacobian_master * self.labels_std
+                    jacobian_master *= self.labels_std
                 except ValueError:
-                    jacobian_master = jacobian_master * self.labels_std.reshape(-1, 1)
+                    jacobian_master *= self.labels_std.reshape(-1, 1)
 
         print(f'Finished all gradient calculation, {(time.time() - start_time):.{2}f} seconds elapsed')
 
-        return jacobian_master
+        # calculation is always done in float32, only cast at the very end
+        return jacobian_master.astype(dtype, copy=False)
 
     @deprecated
     def jacobian_old(self, x=None, mean_output=False, denormalize=False):
@@ -681,12 +822,10 @@ class NeuralNetMaster(ABC):
             raise ValueError('Please provide data to calculate the jacobian')
 
         if self.input_normalizer is not None:
-            x_data = self.input_normalizer.normalize(x, calc=False)
+            x_data = self.input_normalizer.normalize(np.asarray(x, dtype=np.float32), calc=False)
         else:
-            # Prevent shallow copy issue
-            x_data = np.array(x)
-            x_data -= self.input_mean
-            x_data /= self.input_std
+            x_data = (np.asarray(x, dtype=np.float32) - np.asarray(self.input_mean, dtype=np.float32)) / \
+                     np.asarray(self.input_std, dtype=np.float32)
 
         try:
             input_tens = self.keras_model_predict.get_layer("input").input
@@ -704,46 +843,22 @@ class NeuralNetMaster(ABC):
 
         if len(input_shape_expectation) == 3:
             x_data = np.atleast_3d(x_data)
-
-            grad_list = []
-            for j in range(self._labels_shape):
-                grad_list.append(tf.gradients(output_tens[0, j], input_tens))
-
-            final_stack = tf.stack(tf.squeeze(grad_list))
-            jacobian = np.ones((x_data.shape[0], self._labels_shape, x_data.shape[1]), dtype=np.float32)
-
-            for i in range(x_data.shape[0]):
-                x_in = x_data[i:i + 1]
-                jacobian[i, :, :] = get_session().run(final_stack, feed_dict={input_tens: x_in,
-                                                                              tfk.backend.learning_phase(): 0})
-
         elif len(input_shape_expectation) == 4:
-            monoflag = False
             if len(x_data.shape) < 4:
-                monoflag = True
                 x_data = x_data[:, :, :, np.newaxis]
-
-            jacobian = np.ones((x_data.shape[0], self._labels_shape, x_data.shape[1], x_data.shape[2], x_data.shape[3]),
-                               dtype=np.float32)
-
-            grad_list = []
-            for j in range(self._labels_shape):
-                grad_list.append(tf.gradients(self.keras_model.get_layer("output").output[0, j], input_tens))
-
-            final_stack = tf.stack(tf.squeeze(grad_list))
-
-            for i in range(x_data.shape[0]):
-                x_in = x_data[i:i + 1]
-                if monoflag is False:
-                    jacobian[i, :, :, :, :] = get_session().run(final_stack, feed_dict={input_tens: x_in,
-                                                                                        tfk.backend.learning_phase(): 0})
-                else:
-                    jacobian[i, :, :, :, 0] = get_session().run(final_stack, feed_dict={input_tens: x_in,
-                                                                                        tfk.backend.learning_phase(): 0})
-
         else:
             raise ValueError('Input data shape do not match neural network expectation')
 
+        # data points are independent so gradient of a neurone over the whole batch gives per data point gradient
+        final_stack = tf.stack([tf.gradients(output_tens[:, j], input_tens)[0] for j in range(self._labels_shape)],
+                               axis=1)
+        jacobian = np.empty((x_data.shape[0], self._labels_shape, *x_data.shape[1:]), dtype=np.float32)
+
+        for i in range(0, x_data.shape[0], self.batch_size):
+            jacobian[i:i + self.batch_size] = get_session().run(final_stack,
+                                                                feed_dict={input_tens: x_data[i:i + self.batch_size],
+                                                                           tfk.backend.learning_phase(): 0})
+
         if mean_output is True:
             jacobian_master = np.mean(jacobian, axis=0)
         else:
@@ -906,3 +1021,5 @@ class NeuralNetMaster(ABC):
         :History: 2018-Jun-19 - Written - Henry Leung (University of Toronto)
         """
         tfk.backend.clear_session()
+        # cached tensors belong to the cleared graph
+        self._jacobian_tensors = None
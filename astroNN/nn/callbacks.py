@@ -27,10 +27,8 @@ class VirutalCSVLogger(Callback):
         self.sep = separator
         self.filename = filename
         self.append = append
-        self.writer = None
         self.keys = None
         self.append_header = True
-        self.csv_file = None
         self.epoch = []
         self.history = {}
         super().__init__()
@@ -58,22 +56,23 @@ class VirutalCSVLogger(Callback):
             if os.path.exists(self.filename):
                 with open(self.filename, 'r') as f:
                     self.append_header = not bool(len(f.readline()))
-            self.csv_file = open(self.filename, 'a')
+            mode = 'a'
         else:
-            self.csv_file = open(self.filename, 'w')
+            mode = 'w'
 
         class CustomDialect(csv.excel):
             delimiter = self.sep
 
         self.keys = sorted(self.history.keys())
 
-        self.writer = csv.DictWriter(self.csv_file, fieldnames=['epoch'] + self.keys, dialect=CustomDialect)
-        if self.append_header:
-            self.writer.writeheader()
+        # build all rows in memory first, then write them to disk in one go
+        rows = [[epoch, *[self.history[k][i] for k in self.keys]] for i, epoch in enumerate(self.epoch)]
 
-        for i in self.epoch:
-            self.writer.writerow({**{'epoch': self.epoch[i]}, **dict([(k, self.history[k][i]) for k in self.keys])})
-        self.csv_file.close()
+        with open(self.filename, mode, newline='') as csv_file:
+            writer = csv.writer(csv_file, dialect=CustomDialect)
+            if self.append_header:
+                writer.writerow(['epoch'] + self.keys)
+            writer.writerows(rows)
 
 
 class ErrorOnNaN(Callback):
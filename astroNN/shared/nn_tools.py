@@ -6,6 +6,7 @@ import os
 import warnings
 
 import tensorflow as tf
+from packaging import version
 from tensorflow.python.platform.test import is_built_with_cuda, is_gpu_available
 
 
@@ -31,7 +32,7 @@ def cpu_fallback(flag=0):
         raise ValueError('Unknown flag, it can only either be 0 or 1!')
 
 
-def gpu_memory_manage(ratio=None, log_device_placement=False):
+def gpu_memory_manage(ratio=None, log_device_placement=False, async_allocator=False):
     """
     To manage GPU memory usage, prevent Tensorflow preoccupied all the video RAM
 
@@ -39,11 +40,20 @@ def gpu_memory_manage(ratio=None, log_device_placement=False):
     :type ratio: Union[NoneType, float]
     :param log_device_placement: whether or not log the device placement
     :type log_device_placement: bool
+    :param async_allocator: whether or not set environment variable ``TF_GPU_ALLOCATOR`` to ``cuda_malloc_async`` to
+        reduce GPU memory fragmentation if ``ratio`` is None, only effective with Tensorflow 2.5 or above built with
+        CUDA and requires CUDA 11.2 or above driver. It affects all Tensorflow code in the same process and is ignored
+        if ``TF_GPU_ALLOCATOR`` is already set
+    :type async_allocator: bool
     :History: 2017-Nov-25 - Written - Henry Leung (University of Toronto)
     """
     config =  tf.compat.v1.ConfigProto()
     if ratio is None:
         config.gpu_options.allow_growth = True
+        # on-demand allocation with CUDA stream-ordered allocator to reduce fragmentation, only effective if set before
+        # Tensorflow initializes the GPU and respects the setting if user has already set them
+        if async_allocator and is_built_with_cuda() and version.parse(tf.__version__) >= version.parse("2.5.0"):
+            os.environ.setdefault('TF_GPU_ALLOCATOR', 'cuda_malloc_async')
     else:
         if is_built_with_cuda():
             if ratio <= 0. or ratio > 1.:
@@ -88,10 +98,12 @@ def folder_runnum():
     :History: 2017-Nov-25 - Written - Henry Leung (University of Toronto)
     """
     now = datetime.datetime.now()
+    # list the current directory once instead of checking every candidate folder name on disk
+    existing_names = set(os.listdir())
     runnum = 1
     while True:
         folder_name = f'astroNN_{now.month:0{2}d}{now.day:0{2}d}_run{runnum:0{3}d}'
-        if not os.path.exists(folder_name):
+        if folder_name not in existing_names:
             break
         else:
             runnum += 1
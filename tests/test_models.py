@@ -5,18 +5,60 @@ import unittest
 from importlib import import_module
 
 import numpy as np
+import tensorflow as tf
 import tensorflow.keras as tfk
+from packaging import version
 
 import astroNN
 from astroNN.config import config_path
 from astroNN.models import Cifar10CNN, Galaxy10CNN, MNIST_BCNN
 from astroNN.models import load_folder
+from astroNN.models.base_cnn import CNNBase
 from astroNN.nn.callbacks import ErrorOnNaN
+from astroNN.nn.layers import MCDropout
 
 mnist = tfk.datasets.mnist
 utils = tfk.utils
 
 
+class JacobianTestNN(CNNBase):
+    """
+    Small deterministic neural network with fewer input features than output neurones for jacobian tests
+    """
+    def __init__(self):
+        super().__init__()
+        self._implementation_version = '1.0'
+        self.max_epochs = 1
+        self.batch_size = 8
+        self.num_hidden = 16
+        self.input_norm_mode = 0
+        self.labels_norm_mode = 0
+        self.task = 'regression'
+
+    def model(self):
+        input_tensor = tfk.layers.Input(shape=self._input_shape, name='input')
+        flattener = tfk.layers.Flatten()(input_tensor)
+        layer_1 = tfk.layers.Dense(units=self.num_hidden, activation='tanh')(flattener)
+        output = tfk.layers.Dense(units=self._labels_shape, name='output')(layer_1)
+
+        return tfk.models.Model(inputs=input_tensor, outputs=output)
+
+
+class StochasticJacobianTestNN(JacobianTestNN):
+    """
+    Same as JacobianTestNN but with a MCDropout layer hidden inside a nested model
+    """
+    def model(self):
+        input_tensor = tfk.layers.Input(shape=self._input_shape, name='input')
+        flattener = tfk.layers.Flatten()(input_tensor)
+        layer_1 = tfk.layers.Dense(units=self.num_hidden, activation='tanh')(flattener)
+        hidden_tensor = tfk.layers.Input(shape=(self.num_hidden,))
+        dropout_model = tfk.models.Model(inputs=hidden_tensor, outputs=MCDropout(0.2)(hidden_tensor))
+        output = tfk.layers.Dense(units=self._labels_shape, name='output')(dropout_model(layer_1))
+
+        return tfk.models.Model(inputs=input_tensor, outputs=output)
+
+
 class Models_TestCase(unittest.TestCase):
     def test_mnist(self):
         (x_train, y_train), (x_test, y_test) = mnist.load_data()
@@ -220,5 +262,70 @@ class Models_TestCase6(unittest.TestCase):
         self.assertRaises(IOError, load_folder, 'i_am_not_a_fodler')
 
 
+class Models_TestCase7(unittest.TestCase):
+    def setUp(self):
+        self.x_train = np.random.normal(0, 1, (100, 2)).astype(np.float32)
+        self.y_train = np.random.normal(0, 1, (100, 10)).astype(np.float32)
+        self.net = JacobianTestNN()
+        self.net.train(self.x_train, self.y_train)
+
+    def test_jacobian_forward_reverse(self):
+        # 2 input features and 10 output neurones so jacobian() uses forward mode if available
+        jacobian = self.net.jacobian(self.x_train[:20])
+        # jacobian_old() always uses reverse mode
+        jacobian_reverse = self.net.jacobian_old(self.x_train[:20])
+        self.assertEqual(self.net._jacobian_tensors['forward_mode'],
+                         version.parse(tf.__version__) >= version.parse("2.1.0"))
+        np.testing.assert_array_equal(jacobian.shape, [20, 10, 2])
+        np.testing.assert_allclose(jacobian, jacobian_reverse, rtol=1e-4, atol=1e-6)
+
+    def test_jacobian_stochastic(self):
+        # stochastic layer inside a nested model must force reverse mode even with fewer input features
+        net = StochasticJacobianTestNN()
+        net.train(self.x_train, self.y_train)
+        jacobian = net.jacobian(self.x_train[:20])
+        self.assertEqual(net._jacobian_tensors['forward_mode'], False)
+        np.testing.assert_array_equal(jacobian.shape, [20, 10, 2])
+
+
+class Models_TestCase8(unittest.TestCase):
+    def setUp(self):
+        self.x_train = np.random.normal(0, 1, (100, 10)).astype(np.float32)
+        self.y_train = np.random.normal(0, 1, (100, 2)).astype(np.float32)
+        self.net = JacobianTestNN()
+        self.net.train(self.x_train, self.y_train)
+
+    def test_jacobian_batches(self):
+        # 20 data points with batch size 8 to go through multiple batches with a partial last batch
+        jacobian = self.net.jacobian(self.x_train[:20])
+        np.testing.assert_array_equal(jacobian.shape, [20, 2, 10])
+        np.testing.assert_allclose(jacobian, self.net.jacobian_old(self.x_train[:20]), rtol=1e-4, atol=1e-6)
+
+        # mean over data points is reduced on device
+        jacobian_mean = self.net.jacobian(self.x_train[:20], mean_output=True)
+        np.testing.assert_allclose(jacobian_mean, np.mean(jacobian, axis=0), rtol=1e-4, atol=1e-6)
+
+        # the model is deterministic so monte carlo integration should give the same result
+        jacobian_mc = self.net.jacobian(self.x_train[:20], mc_num=2)
+        np.testing.assert_array_equal(jacobian_mc.shape, jacobian.shape)
+        np.testing.assert_allclose(jacobian_mc, jacobian, rtol=1e-4, atol=1e-6)
+
+    def test_jacobian_jit_compile(self):
+        # XLA compilation is only available for Tensorflow 2.1 or above
+        if version.parse(tf.__version__) >= version.parse("2.1.0"):
+            jacobian = self.net.jacobian(self.x_train[:20], jit_compile=False)
+            jacobian_xla = self.net.jacobian(self.x_train[:20], jit_compile=True)
+            np.testing.assert_allclose(jacobian_xla, jacobian, rtol=1e-4, atol=1e-6)
+        else:
+            self.assertRaises(ValueError, self.net.jacobian, self.x_train[:20], jit_compile=True)
+
+    def test_jacobian_dtype(self):
+        jacobian = self.net.jacobian(self.x_train[:20])
+        jacobian_half = self.net.jacobian(self.x_train[:20], dtype=np.float16)
+        self.assertEqual(jacobian.dtype, np.float32)
+        self.assertEqual(jacobian_half.dtype, np.float16)
+        np.testing.assert_allclose(jacobian_half, jacobian, rtol=1e-2, atol=1e-3)
+
+
 if __name__ == '__main__':
     unittest.main()